@@ -6,36 +6,72 @@ This app iscan be used in multiple day retreat kitchens, but it is
 optimized for Dhamma.org meditation center kitchen, where courses happen
 multiple times a year.
 
-Usage: calcprods [-s|-o|-n] [-p PEOPLE] [-d DAYS] [-vmh]
+Usage: calcprods [-s|-o|-n|-t] [-p PEOPLE] [-d DAYS] [-r PROVIDER] [-kw]
+                 [-f FORMAT] [-O FILE] [-vmh]
+       calcprods history ARCHIVE [-p PEOPLE] [-d DAYS] [-f FORMAT]
+                 [-O FILE] [-v]
 
 Try:
   ./calcprods.py -p25 -d2-6
   ./calcprods.py -p 60 -d 1,2,7 -s --nomenu
   ./calcprods.py -nm -v
+  ./calcprods.py -nm -r local
+  ./calcprods.py -okm -p 60
+  ./calcprods.py -tm -d 1-5
+  ./calcprods.py -o --format ndjson --output -
+  ./calcprods.py history archive/ -p 60 -v
+
+Commands:
+  history ARCHIVE     Compare planned and actual consumption from past
+                      runs in ARCHIVE (one sub-directory per run with
+                      its order.csv and instock.csv) and write corrected
+                      day files. PEOPLE and DAYS describe past runs.
+                      Recipe references are written out expanded.
 
 Options:
   -h --help           Show this screen and exit.
   -s --instock        Generate empty instock list.
   -o --order          Generate order list.
-  -n --nutrition      It requires calorieninjas.com api key as
+  -k --packs          Round order list up to supplier packs listed in
+                      data/catalog.csv (name,sku,size,unit,price).
+  -w --waste          With --packs, pick packs by least leftover
+                      instead of least cost.
+  -t --timeline       Break order down by day and show on which day
+                      instock.csv stock runs out.
+  -n --nutrition      Get nutritional values. `api` and `async`
+                      providers require calorieninjas.com api key as
                       FOOD_API_KEY environment variable.
+  -r --provider NAME  Nutrition values source: api, async or local.
+                      [default: api]
   -p --people NUMBER  Number of peaople. [default: 70]
   -d --days NUMBER    Number of days. In 1 or 1-3 or 1,2,5 form.
                       [default: 0-10]
+  -f --format FORMAT  Output format: csv, json or ndjson. [default: csv]
+  -O --output FILE    Write result to FILE instead of out/ directory.
+                      `-` streams it to stdout, implies --nomenu,
+                      sends tables and summaries to stderr and skips
+                      side files, i.e. order.csv with --packs and
+                      corrected day files of history.
   -m --nomenu         Skip menu selection and use switches instead.
   -v                  Print output table to the terminal.
 '''
-import copy
+import sys
 
+from collections.abc import Iterable, Iterator
 from docopt import docopt
 from pathlib import Path
 from simple_term_menu import TerminalMenu  # type: ignore
 
 from utils.consts import (STOCK_OUT_PATH, PREP_OUT_PATH, NUTRITION_OUT_PATH,
-                          STOCK_IN_PATH, DATA_DIR)
-from utils.data import Data, Ingredient
+                          STOCK_IN_PATH, DATA_DIR, HISTORY_OUT_PATH,
+                          HISTORY_MENU_OUT_DIR, CATALOG_IN_PATH, PACKS_OUT_PATH,
+                          TIMELINE_OUT_PATH, OUTPUT_FORMATS, SCALE)
+from utils.data import Data, Ingredient, UnitOfMeasurement, round_quantity
+from utils.history import History
 from utils.nutrition import Nutrition
-from utils.utils import split_str_to_ints, print_list
+from utils.packs import Catalog
+from utils.providers import PROVIDERS
+from utils.utils import split_str_to_ints, print_list, summarize_timeline
 
 
 type IngredientDict = dict[str, list[Ingredient]]  # type: ignore
@@ -68,53 +104,57 @@ class Calcprods:
     def _compare_ingredients(self, ingr_a: Ingredient, ingr_b: Ingredient,
                              subtract=False) -> Ingredient | None:
         '''
-        Merge same name Ingredient objs.
+        Merge same name Ingredient objs. Fixed-point amounts are added up,
+        so no rounding happens.
         '''
         if ingr_a.name == ingr_b.name:
 
             if subtract:
-                quantity = ingr_a.quantity - ingr_b.quantity
+                amount = ingr_a.amount - ingr_b.amount
             else:
-                quantity = ingr_a.quantity + ingr_b.quantity
+                amount = ingr_a.amount + ingr_b.amount
 
-            return Ingredient(
-                name=ingr_a.name,
-                quantity=round(quantity, 2),
-                unit=ingr_a.unit
-            )
+            return Ingredient.from_amount(ingr_a.name, amount, ingr_a.unit)
         return None
 
-    def _merge_duplicates(self, ingredients: list[Ingredient]) -> list[Ingredient]:
-        '''Merge duplicate Ingredient objs in the list.
+    def _iter_merged(self, ingredients: list[Ingredient]) -> Iterator[Ingredient]:
+        '''Merge duplicate Ingredient objs in the list, one by one.
 
-        Finding duplicates method works by examining each set of adjacent
-        objects in the list, from left to right, merging them if they
-        share the same name. Similar to bubble sort algorithm.
+        List is sorted first, so duplicates end up next to each other.
+        Then it is walked from left to right, merging each object into
+        the previous one if they share the same name. Merged object is
+        yielded as soon as the next name differs.
 
         Args:
             ingredients (list[Ingredient]): list of Ingredient objs.
 
-        Returns:
-            list[Ingredient]: sorted and w/o duplicates list of Ingredient objs.
+        Yields:
+            Ingredient: sorted and w/o duplicates Ingredient objs.
         '''
-        n: int = len(ingredients)
-        ingredients = sorted(ingredients)
-        swapped: bool = False
+        merged: Ingredient | None = None
 
-        for i in range(n-1):
-            for j in range(0, n-i-1):
+        for ingr in sorted(ingredients):
+            if merged is None:
+                merged = ingr
+            elif new_ingr := self._compare_ingredients(merged, ingr):
+                merged = new_ingr
+            else:
+                yield merged
+                merged = ingr
 
-                if ingredients[j + 1] is None:
-                    break
+        if merged is not None:
+            yield merged
 
-                if new_ingr := self._compare_ingredients(
-                    ingredients[j], ingredients[j + 1]
-                ):
-                    ingredients[j], ingredients[j + 1] = None, new_ingr
+    def _merge_duplicates(self, ingredients: list[Ingredient]) -> list[Ingredient]:
+        '''Merge duplicate Ingredient objs in the list.
 
-                    swapped = True
+        Args:
+            ingredients (list[Ingredient]): list of Ingredient objs.
 
-        return [ing for ing in ingredients if ing is not None]
+        Returns:
+            list[Ingredient]: sorted and w/o duplicates list of Ingredient objs.
+        '''
+        return list(self._iter_merged(ingredients))
 
     def list_ingredients(self) -> list[Ingredient]:
         '''
@@ -147,14 +187,9 @@ class Calcprods:
         Returns:
             list: list of Ingredient objs without quantity values.
         '''
-        stock: list[Ingredient] = copy.deepcopy(self._ingredients_processed)
-
-        for i in stock:
-            i.quantity = ''  # type: ignore
+        return [Ingredient(i.name, '', i.unit) for i in self._ingredients_processed]
 
-        return stock
-
-    def get_order_list(self, stock_in_path: Path) -> list[Ingredient]:
+    def iter_order_list(self, stock_in_path: Path) -> Iterator[Ingredient]:
         ''' Calculate how much of the ingredients to order.
 
         Gets stock, days, people and calculate how much of produce to order.
@@ -162,8 +197,13 @@ class Calcprods:
         see if there are already any leftover ingredients in pantry. If
         it finds any: it takes them out from the main order list.
 
+        "instock" file is read and checked right away, so mismatch is
+        raised before anything is written, only the ingredients are
+        calculated lazily.
+
         Returns:
-            list[Ingredient]: of what and how much to order.
+            Iterator[Ingredient]: what and how much to order, each yielded
+                as soon as it is calculated.
         '''
         required_ingredients: list[Ingredient] = self._ingredients_processed
         instock_ingredients = self.data.read_csv(stock_in_path)
@@ -174,20 +214,91 @@ class Calcprods:
                 f'match. Make sure that `{stock_in_path}` was generated using'
                 'same days nd people values as is used now.')
 
-        processed_ingredients: list[Ingredient] = []
+        return self._iter_order_list(required_ingredients, instock_ingredients)
 
+    def _iter_order_list(self, required_ingredients: list[Ingredient],
+                         instock_ingredients: list[Ingredient]) -> Iterator[Ingredient]:
         for ingr in required_ingredients:
-            ingr.quantity *= self.people
+            required = Ingredient.from_amount(
+                ingr.name, ingr.amount * self.people, ingr.unit)
+
             for stock_ingr in instock_ingredients:
                 if new_ingr := self._compare_ingredients(
-                    ingr, stock_ingr, subtract=True
+                    required, stock_ingr, subtract=True
                 ):
-                    processed_ingredients.append(new_ingr)
+                    yield new_ingr
 
-        for i in processed_ingredients:
-            i.quantity = round(i.quantity, 2)
+    def get_order_list(self, stock_in_path: Path) -> list[Ingredient]:
+        '''
+        Same as `iter_order_list`, collected to list.
 
-        return processed_ingredients
+        Returns:
+            list[Ingredient]: of what and how much to order.
+        '''
+        return list(self.iter_order_list(stock_in_path))
+
+    def get_timeline(self, stock_in_path: Path) -> list[dict[str, str | float]]:
+        '''Break required ingredients down by day and find when stock runs out.
+
+        Builds day x ingredient matrix of required quantities in one pass
+        over the menu, uses "instock" CSV file as opening balance and takes
+        cumulative sums of daily needs from it. Ingredients missing from
+        "instock" file start from zero. Names and units are the ones of
+        merged ingredients, so rows match the order list.
+
+        Returns:
+            list[dict[str, str | float]]: one row per ingredient, example:
+                [{'name': 'carrots', 'unit': 'kg', 'instock': 2.0,
+                  'day0': 4.2, 'day1': 0.0, 'left': -2.2,
+                  'runs_out': 'day0'}, ...]
+        '''
+        days: list[int] = sorted(set(self.days))
+        day_idx = {day: i for i, day in enumerate(days)}
+
+        names: list[str] = self.ingredient_names
+        units: list[UnitOfMeasurement] = [i.unit for i in self._ingredients_processed]
+        ingr_idx: dict[str, int] = {name: i for i, name in enumerate(names)}
+        need: list[list[int]] = [[0] * len(names) for _ in days]
+
+        for k, ingredients in self.data.menu.items():
+            if (d := day_idx.get(int(k[3]))) is None:
+                continue
+
+            for ingr in ingredients:
+                need[d][ingr_idx[ingr.name]] += ingr.amount * self.people
+
+        stock = {i.name: i.amount for i in self.data.read_csv(stock_in_path)}
+        timeline: list[dict[str, str | float]] = []
+
+        for i in range(len(names)):
+            left: int = stock.get(names[i], 0)
+            row: dict[str, str | float] = {
+                'name': names[i],
+                'unit': units[i].value,
+                'instock': round_quantity(left / SCALE),
+            }
+            runs_out = ''
+
+            for d, day in enumerate(days):
+                left -= need[d][i]
+                row[f'day{day}'] = round_quantity(need[d][i] / SCALE)
+
+                if not runs_out and left < 0:
+                    runs_out = f'day{day}'
+
+            row['left'] = round_quantity(left / SCALE)
+            row['runs_out'] = runs_out
+            timeline.append(row)
+
+        return timeline
+
+
+def get_output_path(output: str | None, default: Path, fmt: str) -> Path | str:
+    '''
+    Return `--output` value if given, otherwise default output path with
+    extension matching the format.
+    '''
+    return output or default.with_suffix(f'.{fmt}')
 
 
 def main() -> None:
@@ -195,17 +306,34 @@ def main() -> None:
 
     days: list[int] = split_str_to_ints(args['--days'])
     people: int = int(args['--people'])
+    fmt: str = args['--format']
+
+    if args['--provider'] not in PROVIDERS:
+        raise ValueError(f'Unknown provider `{args["--provider"]}`, choose one '
+                         f'of: {", ".join(PROVIDERS)}.')
+
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f'Unknown format `{fmt}`, choose one of: '
+                         f'{", ".join(OUTPUT_FORMATS)}.')
+
+    # Results go to stdout, so everything meant for humans goes to stderr
+    # and there is no interactive menu.
+    to_stdout: bool = args['--output'] == '-'
+    log = sys.stderr if to_stdout else sys.stdout
 
     data = Data(path=DATA_DIR)
     cp = Calcprods(data, people, days)
 
     choice: str = ''
 
-    if not args['--nomenu']:
+    if args['history']:
+        choice = 'history'
+    elif not args['--nomenu'] and not to_stdout:
         options: list[str] = [
             '[1] Generate stock list with empty values',
             '[2] Calculate ePromo order list',
-            '[3] Get nutritional values'
+            '[3] Get nutritional values',
+            '[4] Show daily prep timeline with stock depletion',
         ]
 
         terminal_menu = TerminalMenu(options)
@@ -217,6 +345,8 @@ def main() -> None:
             choice = 'order'
         elif menu_entry_index == 2:
             choice = 'nutrition'
+        elif menu_entry_index == 3:
+            choice = 'timeline'
 
     if args['--instock']:
         choice = 'instock'
@@ -224,20 +354,59 @@ def main() -> None:
         choice = 'order'
     elif args['--nutrition']:
         choice = 'nutrition'
+    elif args['--timeline']:
+        choice = 'timeline'
 
     match choice:
         case 'instock':
             instock = cp.get_empty_instock_list()
-            data.write_csv(STOCK_OUT_PATH, instock)
-            print_list(instock) if args['-v'] >= 1 else ...
+            data.write_rows(
+                get_output_path(args['--output'], STOCK_OUT_PATH, fmt), instock, fmt)
+            print_list(instock, log) if args['-v'] >= 1 else ...
         case 'order':
-            order = cp.get_order_list(STOCK_IN_PATH)
-            data.write_csv(PREP_OUT_PATH, order)
-            print_list(order) if args['-v'] >= 1 else ...
+            order: Iterable[Ingredient] = cp.iter_order_list(STOCK_IN_PATH)
+
+            if args['--packs']:
+                order = list(order)
+                if not to_stdout:
+                    data.write_rows(PREP_OUT_PATH.with_suffix(f'.{fmt}'), order, fmt)
+
+                catalog = Catalog(CATALOG_IN_PATH)
+                packs = catalog.get_pack_order(order, by_waste=args['--waste'])
+                data.write_rows(
+                    get_output_path(args['--output'], PACKS_OUT_PATH, fmt), packs, fmt)
+                print_list(packs, log) if args['-v'] >= 1 else ...
+            else:
+                order = list(order) if args['-v'] >= 1 else order
+                data.write_rows(
+                    get_output_path(args['--output'], PREP_OUT_PATH, fmt), order, fmt)
+                print_list(order, log) if args['-v'] >= 1 else ...
         case 'nutrition':
-            nu = Nutrition(cp.ingredient_names)
-            data.write_csv(NUTRITION_OUT_PATH, nu.nutrition)
-            print_list(nu.nutrition) if args['-v'] >= 1 else ...
+            nu = Nutrition(cp.ingredient_names, PROVIDERS[args['--provider']]())
+            data.write_rows(
+                get_output_path(args['--output'], NUTRITION_OUT_PATH, fmt),
+                nu.nutrition, fmt)
+            print_list(nu.nutrition, log) if args['-v'] >= 1 else ...
+        case 'timeline':
+            timeline = cp.get_timeline(STOCK_IN_PATH)
+            data.write_rows(
+                get_output_path(args['--output'], TIMELINE_OUT_PATH, fmt), timeline, fmt)
+            print_list(timeline, log) if args['-v'] >= 1 else ...
+            print(summarize_timeline(timeline), file=log)
+        case 'history':
+            history = History(args['ARCHIVE'])
+            planned = cp.list_ingredients()
+            ratios = history.ratios(planned, people, len(days))
+            corrections = history.corrections(planned, ratios, len(days))
+            data.write_rows(
+                get_output_path(args['--output'], HISTORY_OUT_PATH, fmt),
+                corrections, fmt)
+
+            if not to_stdout:
+                menu = {k: v for k, v in data.menu.items() if int(k[3]) in days}
+                data.write_menu(HISTORY_MENU_OUT_DIR, history.corrected_menu(menu, ratios))
+
+            print_list(corrections, log) if args['-v'] >= 1 else ...
 
 
 if __name__ == '__main__':
@@ -0,0 +1,11 @@
+from tests.reference import TIMINGS
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    if not TIMINGS:
+        return
+
+    terminalreporter.section('differential runtime, total s')
+    for name, engines in TIMINGS.items():
+        terminalreporter.write_line(name.ljust(8) + '  '.join(
+            f'{engine}: {sum(times):.3f}' for engine, times in engines.items()))
@@ -0,0 +1,91 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+from calcprods import Calcprods
+from utils.data import Ingredient, UnitOfMeasurement
+
+
+# Runtime of every engine per operation, filled by differential tests and
+# printed in pytest terminal summary, e.g. TIMINGS['order']['reference'].
+TIMINGS: dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+
+
+@dataclass
+class Item:
+    '''
+    Plain float stand-in for merged Ingredient, so the reference doesn't
+    share fixed-point arithmetic with the engines it checks.
+    '''
+    name: str
+    quantity: float
+    unit: UnitOfMeasurement
+
+
+class ReferenceCalcprods(Calcprods):
+    '''
+    Calcprods with merging and ordering frozen to their original, plain
+    float implementations. Used as the oracle in differential tests:
+    faster engines must give the same results.
+
+    Deviations from the original code: already merged (None) slots are
+    skipped on later passes of bubble-style merge, which used to raise
+    AttributeError when the first two ingredients were duplicates,
+    quantities are no longer rounded to 2 decimal places after every
+    merge and results are float `Item`s instead of Ingredient objs, which
+    keep fixed-point amounts now. Ingredients read from files are shared
+    with the engines, only merging and ordering are independent.
+    '''
+    def _compare_ingredients(self, ingr_a: Ingredient | Item, ingr_b: Ingredient | Item,
+                             subtract=False) -> Item | None:
+        if ingr_a.name == ingr_b.name:
+
+            if subtract:
+                quantity = ingr_a.quantity - ingr_b.quantity
+            else:
+                quantity = ingr_a.quantity + ingr_b.quantity
+
+            return Item(ingr_a.name, quantity, ingr_a.unit)
+        return None
+
+    def _merge_duplicates(self, ingredients: list[Ingredient]) -> list[Ingredient | Item]:
+        n: int = len(ingredients)
+        ingredients: list = sorted(ingredients)
+
+        for i in range(n-1):
+            for j in range(0, n-i-1):
+
+                if ingredients[j + 1] is None:
+                    break
+
+                if ingredients[j] is None:
+                    continue
+
+                if new_ingr := self._compare_ingredients(
+                    ingredients[j], ingredients[j + 1]
+                ):
+                    ingredients[j], ingredients[j + 1] = None, new_ingr
+
+        return [ing for ing in ingredients if ing is not None]
+
+    def get_order_list(self, stock_in_path: Path) -> list[Item]:
+        required_ingredients: list = self._ingredients_processed
+        instock_ingredients = self.data.read_csv(stock_in_path)
+
+        if len(required_ingredients) != len(instock_ingredients):
+            raise ValueError(
+                f'Length of `{stock_in_path}` and current order doesn\'t '
+                f'match. Make sure that `{stock_in_path}` was generated using'
+                'same days nd people values as is used now.')
+
+        processed_ingredients: list[Item] = []
+
+        for ingr in required_ingredients:
+            required = Item(ingr.name, ingr.quantity * self.people, ingr.unit)
+            for stock_ingr in instock_ingredients:
+                if new_ingr := self._compare_ingredients(
+                    required, stock_ingr, subtract=True
+                ):
+                    processed_ingredients.append(new_ingr)
+
+        return processed_ingredients
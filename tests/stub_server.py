@@ -0,0 +1,53 @@
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.providers import LocalProvider
+
+
+class StubServer:
+    '''
+    Local stand-in for calorieninjas.com api, answering from the bundled
+    food database. Use as context manager, `url` is ready to be passed to
+    api providers.
+    '''
+    def __init__(self, api_key: str = 'test-key') -> None:
+        index = LocalProvider().index
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.headers.get('X-Api-Key') != api_key:
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+
+                query = parse_qs(urlparse(self.path).query).get('query', [''])[0]
+                if query == 'broken':
+                    self.send_response(200)
+                    self.end_headers()
+                    self.wfile.write(b'<html>Service Unavailable</html>')
+                    return
+
+                item = index.get(query.lower())
+                body = json.dumps({'items': [item] if item else []}).encode()
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1/nutrition?query='
+
+    def __enter__(self) -> 'StubServer':
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
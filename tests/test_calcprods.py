@@ -1,3 +1,5 @@
+import pytest
+
 from pathlib import Path
 
 from calcprods import Calcprods
@@ -61,6 +63,17 @@ def test_merge_duplicates():
     ]
 
 
+def test_merge_duplicates_keeps_small_quantities():
+    DATA_DIR = 'tests/io_data'
+    data = Data(path=DATA_DIR)
+    cp = Calcprods(data, 60, [1])
+    ings = [Ingredient('broth', 4, UnitOfMeasurement.g) for _ in range(3)]
+
+    assert cp._merge_duplicates(ings) == [
+        Ingredient('broth', 0.012, UnitOfMeasurement.kg),
+    ]
+
+
 def test_list_ingredients():
     DATA_DIR = 'tests/io_data'
     data = Data(path=DATA_DIR)
@@ -97,3 +110,70 @@ def test_get_order_list():
         Ingredient('sunflower oil', 0.0, UnitOfMeasurement.ml),
         Ingredient('water', 18880.0, UnitOfMeasurement.ml),
     ]
+
+
+def test_get_timeline():
+    DATA_DIR = 'tests/io_data'
+    STOCK_IN_PATH = Path('tests/io_data/instock.csv')
+
+    data = Data(path=DATA_DIR)
+    cp = Calcprods(data, 60, [0, 1])
+
+    assert cp.get_timeline(STOCK_IN_PATH) == [
+        {'name': 'carrots', 'unit': 'kg', 'instock': 0.07, 'day0': 4.2,
+         'day1': 0.0, 'left': -4.13, 'runs_out': 'day0'},
+        {'name': 'macaroni', 'unit': 'kg', 'instock': 0.07, 'day0': 0.0,
+         'day1': 4.2, 'left': -4.13, 'runs_out': 'day1'},
+        {'name': 'soy sauce', 'unit': 'cup', 'instock': 0.02, 'day0': 0.0,
+         'day1': 1.2, 'left': -1.18, 'runs_out': 'day1'},
+        {'name': 'sunflower oil', 'unit': 'ml', 'instock': 0.0, 'day0': 0.0,
+         'day1': 0.0, 'left': 0.0, 'runs_out': ''},
+        {'name': 'water', 'unit': 'ml', 'instock': 320.0, 'day0': 0.0,
+         'day1': 19200.0, 'left': -18880.0, 'runs_out': 'day1'},
+    ]
+
+
+def test_iter_order_list():
+    DATA_DIR = 'tests/io_data'
+    STOCK_IN_PATH = Path('tests/io_data/instock.csv')
+
+    data = Data(path=DATA_DIR)
+    cp = Calcprods(data, 60, [0, 1])
+    order = cp.iter_order_list(STOCK_IN_PATH)
+
+    assert next(order) == Ingredient('carrots', 4.13, UnitOfMeasurement.kg)
+    assert len(list(order)) == 4
+
+
+def test_iter_order_list_value_error(tmp_path):
+    DATA_DIR = 'tests/io_data'
+    STOCK_IN_PATH = tmp_path / 'instock.csv'
+    STOCK_IN_PATH.write_text('name,quantity,unit\ncarrots,1.0,kg\n')
+
+    data = Data(path=DATA_DIR)
+    cp = Calcprods(data, 60, [0, 1])
+
+    # Raised on call, before any row is consumed.
+    with pytest.raises(ValueError) as exc_info:
+        cp.iter_order_list(STOCK_IN_PATH)
+
+    assert exc_info.value.args[0].startswith(
+        f'Length of `{STOCK_IN_PATH}` and current order doesn\'t match.')
+
+
+def test_get_timeline_mixed_units():
+    DATA_DIR = 'tests/io_data/mixed_units'
+    STOCK_IN_PATH = Path('tests/io_data/mixed_units/instock.csv')
+
+    data = Data(path=DATA_DIR)
+    cp = Calcprods(data, 10, [0, 1])
+    timeline = cp.get_timeline(STOCK_IN_PATH)
+
+    assert timeline == [
+        {'name': 'carrots', 'unit': 'kg', 'instock': 0.5, 'day0': 0.0,
+         'day1': 1.0, 'left': -0.5, 'runs_out': 'day1'},
+        {'name': 'oregano', 'unit': 'kg', 'instock': 0.1, 'day0': 50.0,
+         'day1': 0.45, 'left': -50.35, 'runs_out': 'day0'},
+    ]
+    assert [(row['name'], row['unit']) for row in timeline] == \
+        [(i.name, i.unit.value) for i in cp.get_order_list(STOCK_IN_PATH)]
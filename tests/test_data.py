@@ -1,3 +1,5 @@
+import json
+import os
 import pytest
 
 from pathlib import Path
@@ -79,3 +81,109 @@ def test_obj_to_dict_for_csv_with_Macros_obj():
         'name': 'carrots',
         'protein_g': 1,
     }]
+
+
+def test_write_rows_ndjson(capsys):
+    data = Data(path='tests/io_data')
+    rows = (Ingredient('water', q, UnitOfMeasurement('ml')) for q in (35, 70))
+
+    data.write_rows('-', rows, 'ndjson')
+    assert capsys.readouterr().out == \
+        '{"name": "water", "quantity": 35.0, "unit": "ml"}\n' \
+        '{"name": "water", "quantity": 70.0, "unit": "ml"}\n'
+
+
+def test_write_rows_json(tmp_path):
+    data = Data(path='tests/io_data')
+    ingr = Macros('carrots', 35, 8, 1, 2, '87/9/5')
+
+    data.write_rows(tmp_path / 'nutrition.json', [ingr], 'json')
+    assert json.loads((tmp_path / 'nutrition.json').read_text()) == [{
+        'name': 'carrots',
+        'calories_kcal': 35,
+        'carbs_g': 8,
+        'protein_g': 1,
+        'fat_g': 2,
+        'macros': '87/9/5',
+    }]
+
+    data.write_rows(tmp_path / 'empty.json', [], 'json')
+    assert json.loads((tmp_path / 'empty.json').read_text()) == []
+
+
+def test_write_rows_csv(tmp_path):
+    data = Data(path='tests/io_data')
+    rows = [{'name': 'water', 'left': -5.0}, {'name': 'salt', 'left': 1.0}]
+
+    data.write_rows(tmp_path / 'out.csv', rows)
+    assert (tmp_path / 'out.csv').read_text() == \
+        'name,left\nwater,-5.0\nsalt,1.0\n'
+
+
+def test_write_rows_value_error():
+    data = Data(path='tests/io_data')
+
+    with pytest.raises(ValueError) as exc_info:
+        data.write_rows('-', [], 'xml')
+
+    assert exc_info.value.args[0] == \
+        'Unknown format `xml`, choose one of: csv, json, ndjson.'
+
+
+def test_sort_ingredients_with_mixed_units():
+    ings = [
+        Ingredient('salt', 0.0, UnitOfMeasurement.tsp),
+        Ingredient('salt', 0.0, UnitOfMeasurement.kg),
+    ]
+    assert sorted(ings) == ings[::-1]
+
+
+def test_ingredient_amount():
+    assert Ingredient('basil', 4, UnitOfMeasurement.g).amount == 4000
+    assert Ingredient('water', 0.035, UnitOfMeasurement.L).amount == 35_000_000
+    assert Ingredient('soy sauce', 1, UnitOfMeasurement.tbsp).amount == 14_786_800
+    assert Ingredient('carrots', '', UnitOfMeasurement.kg).amount is None
+
+    ingr = Ingredient.from_amount('basil', 4000, UnitOfMeasurement.kg)
+    assert ingr == Ingredient('basil', 0.004, UnitOfMeasurement.kg)
+
+
+def test_tight_dict_rounds_quantity():
+    ingr = Ingredient('soy sauce', 3, UnitOfMeasurement.tbsp)
+
+    assert ingr.quantity == 44.3604
+    assert ingr.tight_dict() == {
+        'name': 'soy sauce',
+        'quantity': 44.36,
+        'unit': 'ml',
+    }
+
+
+def test_write_rows_keeps_file_on_error(tmp_path):
+    data = Data(path='tests/io_data')
+    (tmp_path / 'order.json').write_text('[]\n')
+
+    def rows():
+        yield Ingredient('water', 35, UnitOfMeasurement('ml'))
+        raise ValueError('Failed')
+
+    with pytest.raises(ValueError):
+        data.write_rows(tmp_path / 'order.json', rows(), 'json')
+
+    assert (tmp_path / 'order.json').read_text() == '[]\n'
+    assert [p.name for p in tmp_path.iterdir()] == ['order.json']
+
+
+def test_write_rows_file_mode(tmp_path):
+    data = Data(path='tests/io_data')
+    umask = os.umask(0o022)
+
+    try:
+        data.write_rows(tmp_path / 'new.csv', [{'name': 'salt'}])
+        assert (tmp_path / 'new.csv').stat().st_mode & 0o777 == 0o644
+
+        (tmp_path / 'old.csv').touch(mode=0o640)
+        data.write_rows(tmp_path / 'old.csv', [{'name': 'salt'}])
+        assert (tmp_path / 'old.csv').stat().st_mode & 0o777 == 0o640
+    finally:
+        os.umask(umask)
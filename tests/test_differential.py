@@ -0,0 +1,158 @@
+'''
+Differential tests: random menus and stock files are run through the
+reference implementation and every other Calcprods engine, which must
+give the same results within float tolerance. Runtime of each engine is
+shown in pytest terminal summary.
+'''
+import csv
+import random
+import time
+import pytest
+
+from pathlib import Path
+
+from calcprods import Calcprods
+from tests.reference import TIMINGS, ReferenceCalcprods
+from utils.data import Data, Ingredient, UnitOfMeasurement
+
+
+ENGINES: dict[str, type[Calcprods]] = {
+    'reference': ReferenceCalcprods,
+    'calcprods': Calcprods,
+}
+# Float reference only drifts by accumulated float error.
+TOLERANCE = 1e-9
+SEEDS = range(5)
+
+# Interchangeable units that end up as the same unit, and odd ones that
+# don't, to get ingredients listed with mixed units.
+UNITS = [('kg', 'g'), ('ml', 'L', 'tbsp'), ('cup',), ('tsp',), ('pcs',)]
+
+
+def random_quantity(rng: random.Random) -> str:
+    return str(round(rng.uniform(0, 5), rng.choice((0, 1, 2, 3, 4))))
+
+
+def write_csv(filepath: Path, rows: list[dict[str, str]]) -> None:
+    with open(filepath, 'w') as file:
+        writer = csv.DictWriter(file, ['name', 'unit', 'quantity'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def make_menu(path: Path, rng: random.Random, rows: int) -> None:
+    '''
+    Write `rows` ingredient rows spread over random day files. Names
+    repeat a lot and some of them come in a different unit.
+    '''
+    names = [f'ingredient {i}' for i in range(rows // 8 + 1)]
+    units = {name: rng.choice(UNITS) for name in names}
+    files: dict[str, list[dict[str, str]]] = {}
+
+    for _ in range(rows):
+        name = rng.choice(names)
+        family = units[name] if rng.random() > 0.02 else rng.choice(UNITS)
+        day = f'day{rng.randrange(10)}.{rng.randrange(5)}'
+
+        files.setdefault(day, []).append({
+            'name': name,
+            'unit': rng.choice(family),
+            'quantity': random_quantity(rng),
+        })
+
+    for day, day_rows in files.items():
+        write_csv(Path(path, f'{day}.csv'), day_rows)
+
+
+def make_stock(filepath: Path, rng: random.Random,
+               ingredients: list[Ingredient]) -> None:
+    '''
+    Write instock file for the ingredients. Some quantities are left
+    empty, sometimes one ingredient is missing or renamed.
+    '''
+    rows = [{
+        'name': ingr.name,
+        'unit': ingr.unit.value,
+        'quantity': '' if rng.random() < 0.1 else random_quantity(rng),
+    } for ingr in ingredients]
+
+    if rows and rng.random() < 0.2:
+        rows.pop(rng.randrange(len(rows)))
+    if rows and rng.random() < 0.2:
+        rows[rng.randrange(len(rows))]['name'] = 'unknown'
+
+    write_csv(filepath, rows)
+
+
+def run_engines(name: str, func) -> dict[str, object]:
+    '''
+    Call `func(engine)` for every engine, recording result or raised
+    exception type together with the runtime.
+    '''
+    results: dict[str, object] = {}
+
+    for engine, cls in ENGINES.items():
+        start = time.perf_counter()
+        try:
+            results[engine] = func(cls)
+        except Exception as exc:
+            results[engine] = type(exc)
+        TIMINGS[name][engine].append(time.perf_counter() - start)
+
+    return results
+
+
+def assert_same(results: dict[str, object]) -> None:
+    expected = results.pop('reference')
+
+    for engine, result in results.items():
+        if isinstance(expected, type) or isinstance(result, type):
+            assert result == expected, engine
+            continue
+
+        assert [(i.name, i.unit) for i in result] == \
+            [(i.name, i.unit) for i in expected], engine
+        assert [i.quantity for i in result] == \
+            pytest.approx([i.quantity for i in expected], abs=TOLERANCE), engine
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_merge_duplicates(seed, tmp_path):
+    rng = random.Random(seed)
+    make_menu(tmp_path, rng, 50)
+    data = Data(path=str(tmp_path))
+
+    ingredients = [
+        Ingredient(f'ingredient {rng.randrange(200)}', float(random_quantity(rng)),
+                   UnitOfMeasurement(rng.choice(rng.choice(UNITS))))
+        for _ in range(2000)
+    ]
+
+    assert_same(run_engines(
+        'merge', lambda cls: cls(data, 1, [0])._merge_duplicates(list(ingredients))))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_list_ingredients(seed, tmp_path):
+    rng = random.Random(seed)
+    make_menu(tmp_path, rng, 5000)
+    data = Data(path=str(tmp_path))
+    days = rng.sample(range(10), rng.randint(1, 10))
+
+    assert_same(run_engines(
+        'list', lambda cls: cls(data, 1, days).list_ingredients()))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_get_order_list(seed, tmp_path):
+    rng = random.Random(seed)
+    make_menu(tmp_path, rng, 5000)
+    days = rng.sample(range(10), rng.randint(1, 10))
+    people = rng.randint(1, 120)
+
+    data = Data(path=str(tmp_path))
+    stock_path = Path(tmp_path, 'instock.csv')
+    make_stock(stock_path, rng, Calcprods(data, 1, days).list_ingredients())
+
+    assert_same(run_engines(
+        'order', lambda cls: cls(data, people, days).get_order_list(stock_path)))
@@ -0,0 +1,100 @@
+import pytest
+
+from calcprods import Calcprods
+from utils.data import Consumption, Data, Ingredient, UnitOfMeasurement
+from utils.history import History
+
+
+def test_history_ingest():
+    history = History('tests/io_data/archive')
+
+    assert history.runs == ['run1', 'run2']
+    assert history.names == ['carrots', 'macaroni', 'water']
+    assert len(history.amount) == 7
+
+
+def test_history_value_error():
+    with pytest.raises(ValueError) as exc_info:
+        History('tests/nonexist')
+
+    assert exc_info.value.args[0] == \
+        "Expected `tests/nonexist` directory doesn't exist."
+
+
+def test_consumption():
+    history = History('tests/io_data/archive')
+
+    assert history.consumption(60, 2) == pytest.approx({
+        'carrots': 0.035,
+        'macaroni': 0.05,
+        'water': 160.0,
+    })
+
+
+def test_corrections():
+    data = Data(path='tests/io_data')
+    cp = Calcprods(data, 60, [0, 1])
+    history = History('tests/io_data/archive')
+
+    planned = cp.list_ingredients()
+    ratios = history.ratios(planned, 60, 2)
+
+    assert history.corrections(planned, ratios, 2) == [
+        Consumption('carrots', 'kg', 0.035, 0.035, 1.0),
+        Consumption('macaroni', 'kg', 0.035, 0.05, 1.43),
+        Consumption('water', 'ml', 160.0, 160.0, 1.0),
+    ]
+
+
+def test_consumption_ignores_negative_order():
+    history = History('tests/io_data/archive_negative')
+
+    assert history.consumption(10, 1) == pytest.approx({'carrots': 0.6})
+
+
+def test_consumption_skips_unknown_leftovers():
+    history = History('tests/io_data/archive_missing')
+
+    # run2 doesn't list macaroni and run3 has no instock.csv, so only
+    # carrots from run1 to run2 are known.
+    assert history.consumption(10, 1) == pytest.approx({'carrots': 0.5})
+
+
+def test_ratios():
+    data = Data(path='tests/io_data')
+    cp = Calcprods(data, 60, [0, 1])
+    history = History('tests/io_data/archive')
+
+    assert history.ratios(cp.list_ingredients(), 60, 2) == pytest.approx({
+        'carrots': 1.0,
+        'macaroni': 0.05 / 0.035,
+        'water': 1.0,
+    })
+
+
+def test_corrected_menu():
+    menu = {'day1.1': [
+        Ingredient('water', 250.0, UnitOfMeasurement.ml),
+        Ingredient('macaroni', 0.07, UnitOfMeasurement.kg),
+    ]}
+
+    assert History.corrected_menu(menu, {'macaroni': 0.05 / 0.035}) == {'day1.1': [
+        Ingredient('water', 250.0, UnitOfMeasurement.ml),
+        Ingredient('macaroni', 0.1, UnitOfMeasurement.kg),
+    ]}
+
+
+def test_corrected_menu_write(tmp_path):
+    data = Data(path='tests/io_data')
+    menu = {'day0': [
+        Ingredient('oregano', 0.75, UnitOfMeasurement.g),
+        Ingredient('soy sauce', 0.0024, UnitOfMeasurement.kg),
+    ]}
+    corrected = History.corrected_menu(menu, {'oregano': 1.0, 'soy sauce': 1.1})
+
+    data.write_menu(tmp_path, corrected)
+
+    # Per person quantities aren't rounded to output decimals.
+    assert Data(path=str(tmp_path)).menu == corrected
+    assert (tmp_path / 'day0.csv').read_text() == \
+        'name,quantity,unit\noregano,0.00075,kg\nsoy sauce,0.00264,kg\n'
@@ -0,0 +1,92 @@
+import pytest
+
+from tests.stub_server import StubServer
+from utils.data import Macros
+from utils.nutrition import Nutrition
+from utils.providers import ApiProvider, AsyncApiProvider, LocalProvider
+
+
+CARROTS = Macros('carrots', 41.0, 9.6, 0.9, 0.2, '88/8/4')
+WATER = Macros('water', 0.0, 0.0, 0.0, 0.0, '')
+
+
+def test_local_provider_lookup():
+    responses = LocalProvider().lookup(['Carrots', 'onion', 'dragon fruit'])
+
+    assert responses[0]['items'][0]['calories'] == 41.0
+    assert responses[1]['items'][0]['name'] == 'onions'
+    assert responses[2] is None
+
+
+def test_local_provider_value_error():
+    with pytest.raises(ValueError) as exc_info:
+        LocalProvider('tests/nonexist/food.csv')
+
+    assert exc_info.value.args[0] == "tests/nonexist/food.csv doesn't exist."
+
+
+def test_nutrition_with_local_provider():
+    nu = Nutrition(['carrots', 'water', 'dragon fruit'], LocalProvider())
+
+    assert nu.nutrition == [CARROTS, WATER]
+
+
+def test_api_provider():
+    with StubServer() as server:
+        provider = ApiProvider(server.url, api_key='test-key')
+        nu = Nutrition(['carrots', 'water', 'dragon fruit'], provider)
+
+    assert nu.nutrition == [CARROTS, WATER]
+
+
+def test_api_provider_failed_lookup(capsys):
+    with StubServer() as server:
+        provider = ApiProvider(server.url, api_key='wrong-key')
+        responses = provider.lookup(['carrots'])
+
+    assert responses == [None]
+    assert capsys.readouterr().err.startswith('carrots: FAILED: 401')
+
+
+def test_api_provider_value_error(monkeypatch):
+    monkeypatch.delenv('FOOD_API_KEY', raising=False)
+
+    with pytest.raises(ValueError) as exc_info:
+        ApiProvider()
+
+    assert exc_info.value.args[0] == \
+        'Api key is missing. Set FOOD_API_KEY environment variable or use ' \
+        'local provider.'
+
+
+def test_async_api_provider():
+    pytest.importorskip('httpx')
+
+    with StubServer() as server:
+        provider = AsyncApiProvider(server.url, api_key='test-key')
+        nu = Nutrition(['carrots', 'water', 'dragon fruit'], provider)
+
+    assert nu.nutrition == [CARROTS, WATER]
+
+
+def test_async_api_provider_failed_lookup(capsys):
+    pytest.importorskip('httpx')
+
+    with StubServer() as server:
+        provider = AsyncApiProvider(server.url, api_key='wrong-key')
+        responses = provider.lookup(['carrots', 'water'])
+
+    assert responses == [None, None]
+    assert 'carrots: FAILED:' in capsys.readouterr().err
+
+
+def test_async_api_provider_broken_response(capsys):
+    pytest.importorskip('httpx')
+
+    with StubServer() as server:
+        provider = AsyncApiProvider(server.url, api_key='test-key')
+        responses = provider.lookup(['broken', 'carrots'])
+
+    assert responses[0] is None
+    assert responses[1]['items'][0]['name'] == 'carrots'
+    assert 'broken: FAILED:' in capsys.readouterr().err
@@ -0,0 +1,134 @@
+import random
+import time
+import pytest
+
+from pathlib import Path
+
+from calcprods import Calcprods
+from utils.data import Data, Ingredient, PackOrder, UnitOfMeasurement
+from utils.packs import Catalog, Pack
+
+
+CATALOG_PATH = Path('tests/io_data/catalog.csv')
+
+
+def test_read_csv():
+    catalog = Catalog(CATALOG_PATH)
+
+    assert catalog.packs['carrots'] == [
+        Pack('CAR-1', 1_000_000, UnitOfMeasurement.kg, 1.2),
+        Pack('CAR-5', 5_000_000, UnitOfMeasurement.kg, 4.5),
+    ]
+    assert catalog.packs['macaroni'][0] == \
+        Pack('MAC-500', 500_000, UnitOfMeasurement.kg, 0.9)
+
+
+def test_read_csv_value_error():
+    with pytest.raises(ValueError) as exc_info:
+        Catalog(Path('tests/nonexist/catalog.csv'))
+
+    assert exc_info.value.args[0] == \
+        "tests/nonexist/catalog.csv doesn't exist. Create new " \
+        "tests/nonexist/catalog.csv with name,sku,size,unit,price columns."
+
+
+def test_pick_packs_by_cost():
+    catalog = Catalog(CATALOG_PATH)
+    ingr = Ingredient('carrots', 4.13, UnitOfMeasurement.kg)
+
+    assert catalog.pick_packs(ingr) == [
+        PackOrder('carrots', 'CAR-5', 5.0, 'kg', 1, 4.5),
+    ]
+
+
+def test_pick_packs_by_waste():
+    catalog = Catalog(CATALOG_PATH)
+    ingr = Ingredient('macaroni', 4.13, UnitOfMeasurement.kg)
+
+    assert catalog.pick_packs(ingr, by_waste=True) == [
+        PackOrder('macaroni', 'MAC-500', 0.5, 'kg', 3, 2.7),
+        PackOrder('macaroni', 'MAC-3', 3.0, 'kg', 1, 4.8),
+    ]
+
+
+def test_pick_packs_small_packs():
+    catalog = Catalog(CATALOG_PATH)
+
+    # Sizes aren't rounded to whole grams and any positive amount needs
+    # at least one pack.
+    assert catalog.pick_packs(Ingredient('saffron', 0.3, UnitOfMeasurement.g)) == [
+        PackOrder('saffron', 'SAF-02', 0.0002, 'kg', 2, 1.0),
+    ]
+    assert catalog.pick_packs(Ingredient('pepper', 3, UnitOfMeasurement.g)) == [
+        PackOrder('pepper', 'PEP-15', 0.0015, 'kg', 2, 0.6),
+    ]
+
+
+def test_pick_packs_coarse_steps():
+    catalog = Catalog(CATALOG_PATH)
+    catalog.packs['flour'] = [
+        Pack('FL-1', 1_000_000, UnitOfMeasurement.kg, 1.0),
+        Pack('FL-3', 333_333, UnitOfMeasurement.kg, 0.4),
+    ]
+    packs = catalog.pick_packs(Ingredient('flour', 250, UnitOfMeasurement.kg))
+
+    assert sum(p.size * p.count for p in packs) >= 250
+
+
+def test_pick_packs_unknown_ingredient():
+    catalog = Catalog(CATALOG_PATH)
+    ingr = Ingredient('soy sauce', 1.18, UnitOfMeasurement.cup)
+
+    assert catalog.pick_packs(ingr) == []
+
+
+def test_get_pack_order():
+    data = Data(path='tests/io_data')
+    cp = Calcprods(data, 60, [0, 1])
+    catalog = Catalog(CATALOG_PATH)
+
+    order = cp.get_order_list(Path('tests/io_data/instock.csv'))
+    assert catalog.get_pack_order(order) == [
+        PackOrder('carrots', 'CAR-5', 5.0, 'kg', 1, 4.5),
+        PackOrder('macaroni', 'MAC-500', 0.5, 'kg', 3, 2.7),
+        PackOrder('macaroni', 'MAC-3', 3.0, 'kg', 1, 4.8),
+        PackOrder('soy sauce', '', 1.18, 'cup', 1, 0.0),
+        PackOrder('water', 'WAT-5', 5000.0, 'ml', 4, 3.2),
+    ]
+
+
+def test_pick_packs_skips_dominated():
+    catalog = Catalog(CATALOG_PATH)
+    catalog.packs['flour'] = [
+        Pack('FL-1', 1_000_000, UnitOfMeasurement.kg, 2.0),
+        Pack('FL-2', 2_000_000, UnitOfMeasurement.kg, 1.5),
+    ]
+
+    assert catalog.pick_packs(Ingredient('flour', 0.5, UnitOfMeasurement.kg)) == [
+        PackOrder('flour', 'FL-2', 2.0, 'kg', 1, 1.5),
+    ]
+
+
+@pytest.mark.parametrize('by_waste', [False, True])
+def test_get_pack_order_many_skus(by_waste):
+    rng = random.Random(0)
+    catalog = Catalog(CATALOG_PATH)
+    order: list[Ingredient] = []
+
+    for i in range(20):
+        catalog.packs[f'ingredient {i}'] = [
+            Pack(f'SKU-{i}-{j}', amount, UnitOfMeasurement.kg,
+                 round(amount / 1_000_000 * rng.uniform(0.8, 1.5), 2))
+            for j, amount in enumerate(
+                rng.randint(100, 25_000) * 1000 for _ in range(50))
+        ]
+        order.append(Ingredient(f'ingredient {i}', rng.uniform(5, 300),
+                                UnitOfMeasurement.kg))
+
+    start = time.perf_counter()
+    packs = catalog.get_pack_order(order, by_waste)
+
+    assert time.perf_counter() - start < 5
+    for ingr in order:
+        assert sum(p.size * p.count for p in packs if p.name == ingr.name) \
+            >= ingr.quantity
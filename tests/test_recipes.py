@@ -0,0 +1,82 @@
+import pytest
+
+from calcprods import Calcprods
+from utils.data import Data, Ingredient, Recipes, UnitOfMeasurement
+
+
+DATA_DIR = 'tests/io_data/recipes_menu'
+RECIPES_DIR = 'tests/io_data/recipes_menu/recipes'
+
+
+def test_flatten():
+    recipes = Recipes(RECIPES_DIR)
+
+    assert recipes.flatten('broth') == [
+        Ingredient('carrots', 0.05, UnitOfMeasurement.kg),
+        Ingredient('water', 250.0, UnitOfMeasurement.ml),
+        Ingredient('salt', 0.002, UnitOfMeasurement.kg),
+    ]
+
+
+def test_flatten_nested():
+    recipes = Recipes(RECIPES_DIR)
+
+    assert recipes.flatten('soup') == [
+        Ingredient('carrots', 0.06, UnitOfMeasurement.kg),
+        Ingredient('water', 250.0, UnitOfMeasurement.ml),
+        Ingredient('salt', 0.002, UnitOfMeasurement.kg),
+        Ingredient('potatoes', 0.15, UnitOfMeasurement.kg),
+    ]
+
+
+def test_flatten_is_memoized():
+    recipes = Recipes(RECIPES_DIR)
+
+    assert recipes.flatten('soup') is recipes.flatten('soup')
+    assert set(recipes._flattened) == {'broth', 'soup'}
+
+
+def test_flatten_value_error():
+    recipes = Recipes(RECIPES_DIR)
+
+    with pytest.raises(ValueError) as exc_info:
+        recipes.flatten('loop a')
+
+    assert exc_info.value.args[0] == \
+        'Recipe `loop a` references itself through `loop a > loop b > loop a`.'
+
+
+def test_get_days_with_recipes():
+    data = Data(path=DATA_DIR)
+
+    assert data.menu == {
+        'day0': [
+            Ingredient('carrots', 0.06, UnitOfMeasurement.kg),
+            Ingredient('water', 250.0, UnitOfMeasurement.ml),
+            Ingredient('salt', 0.002, UnitOfMeasurement.kg),
+            Ingredient('potatoes', 0.15, UnitOfMeasurement.kg),
+            Ingredient('macaroni', 0.07, UnitOfMeasurement.kg),
+        ],
+        'day1': [
+            Ingredient('carrots', 0.025, UnitOfMeasurement.kg),
+            Ingredient('water', 125.0, UnitOfMeasurement.ml),
+            Ingredient('salt', 0.001, UnitOfMeasurement.kg),
+            Ingredient('carrots', 0.12, UnitOfMeasurement.kg),
+            Ingredient('water', 500.0, UnitOfMeasurement.ml),
+            Ingredient('salt', 0.004, UnitOfMeasurement.kg),
+            Ingredient('potatoes', 0.3, UnitOfMeasurement.kg),
+        ],
+    }
+
+
+def test_list_ingredients_with_recipes():
+    data = Data(path=DATA_DIR)
+    cp = Calcprods(data, 60, [0, 1])
+
+    assert cp.list_ingredients() == [
+        Ingredient('carrots', 0.205, UnitOfMeasurement.kg),
+        Ingredient('macaroni', 0.07, UnitOfMeasurement.kg),
+        Ingredient('potatoes', 0.45, UnitOfMeasurement.kg),
+        Ingredient('salt', 0.007, UnitOfMeasurement.kg),
+        Ingredient('water', 875.0, UnitOfMeasurement.ml),
+    ]
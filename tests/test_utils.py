@@ -5,7 +5,7 @@ from pathlib import Path
 from utils.data import Data
 from calcprods import Calcprods
 from utils.utils import (
-    tabulate_data, split_str_to_ints
+    tabulate_data, split_str_to_ints, summarize_timeline
 )
 
 
@@ -41,3 +41,19 @@ def test_split_str_to_ints():
     with pytest.raises(ValueError) as excinfo:
         split_str_to_ints('foo')
     assert 'Wrong digit or digits range.' in str(excinfo.value)
+
+
+def test_summarize_timeline():
+    timeline = [
+        {'name': 'carrots', 'unit': 'kg', 'instock': 5.0, 'day0': 4.2,
+         'day1': 4.2, 'left': -3.4, 'runs_out': 'day1'},
+        {'name': 'water', 'unit': 'ml', 'instock': 500.0, 'day0': 250.0,
+         'day1': 250.0, 'left': 0.0, 'runs_out': ''},
+    ]
+    assert summarize_timeline(timeline) == \
+        'name     runs out      short  unit\n' \
+        '-------  ----------  -------  ------\n' \
+        'carrots  day1            3.4  kg'
+
+    assert summarize_timeline(timeline[1:]) == \
+        'Stock lasts for all selected days.'
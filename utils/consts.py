@@ -5,14 +5,29 @@ from pathlib import Path
 
 DATA_DIR = 'data'
 OUTPUT_DIR = 'out'
+RECIPES_DIRNAME = 'recipes'
+OUTPUT_FORMATS = ('csv', 'json', 'ndjson')
+
+# Fixed-point units per ingredient unit, decimal places that keep them
+# exact and decimal places of quantities in output files.
+SCALE = 1_000_000
+SCALE_DECIMALS = 6
+QUANTITY_DECIMALS = 3
 STOCK_FILENAME = 'instock.csv'
 PREP_FILENAME = 'order.csv'
 
 STOCK_IN_PATH = Path(DATA_DIR, STOCK_FILENAME)
 PREP_IN_PATH = Path(DATA_DIR, PREP_FILENAME)
+CATALOG_IN_PATH = Path(DATA_DIR, 'catalog.csv')
 
 STOCK_OUT_PATH = Path(OUTPUT_DIR, STOCK_FILENAME)
 PREP_OUT_PATH = Path(OUTPUT_DIR, PREP_FILENAME)
 
 NUTRITION_OUT_PATH = Path(OUTPUT_DIR, 'nutrition.csv')
-FOOD_API_KEY = os.getenv('FOOD_API_KEY')
+PACKS_OUT_PATH = Path(OUTPUT_DIR, 'packs.csv')
+TIMELINE_OUT_PATH = Path(OUTPUT_DIR, 'timeline.csv')
+HISTORY_OUT_PATH = Path(OUTPUT_DIR, 'history.csv')
+HISTORY_MENU_OUT_DIR = Path(OUTPUT_DIR, 'history')
+FOOD_API_URL = 'https://api.calorieninjas.com/v1/nutrition?query='
+FOOD_API_KEY_ENV = 'FOOD_API_KEY'
+FOOD_DB_PATH = Path(os.path.dirname(__file__), 'food.csv')
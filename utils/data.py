@@ -1,13 +1,21 @@
 import csv
 import glob
+import itertools
+import json
 import os
 import re
+import sys
+import tempfile
 
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
+from decimal import Decimal
 from enum import Enum
 from pathlib import Path
+from typing import TextIO
 
-from utils.consts import DATA_DIR
+from utils.consts import (DATA_DIR, OUTPUT_FORMATS, QUANTITY_DECIMALS,
+                          RECIPES_DIRNAME, SCALE, SCALE_DECIMALS)
 
 
 @dataclass
@@ -20,6 +28,25 @@ class Macros:
     macros: str
 
 
+@dataclass
+class Consumption:
+    name: str
+    unit: str
+    planned: float
+    actual: float
+    ratio: float
+
+
+@dataclass
+class PackOrder:
+    name: str
+    sku: str
+    size: float
+    unit: str
+    count: int
+    cost: float
+
+
 class UnitOfMeasurement(Enum):
     '''
     More units and conversions at
@@ -33,15 +60,71 @@ class UnitOfMeasurement(Enum):
     tsp = 'tsp'
     tbsp = 'tbsp'
     pcs = 'pcs'
+    recipe = 'recipe'
+
+    def __lt__(self, other: 'UnitOfMeasurement') -> bool:
+        '''
+        Let same name and quantity Ingredient objs with different units
+        be sorted.
+        '''
+        return self.value < other.value
 
 
-@dataclass(order=True)
+@dataclass(order=True, init=False)
 class Ingredient:
+    '''
+    Ingredient keeps its quantity only as `amount`: integer number of
+    millionths of its (converted) unit, i.e. mg for kg, nl for ml. Merging
+    and ordering add up amounts, so nothing is lost to rounding on the
+    way. `quantity` is read from `amount` and is rounded only when written
+    out. Empty quantity of instock list to be filled out has no amount.
+    '''
     name: str
-    quantity: float
+    amount: int | None
     unit: UnitOfMeasurement
 
-    def tight_dict(self) -> dict[str, str | float]:
+    def __init__(self, name: str, quantity: float | str,
+                 unit: UnitOfMeasurement) -> None:
+        self.name = name
+        self.unit = unit
+
+        if quantity == '':
+            self.amount = None
+            return
+
+        amount = Decimal(str(quantity or 0)) * SCALE
+
+        if self.unit == UnitOfMeasurement.g:
+            self.unit = UnitOfMeasurement.kg
+            amount /= 1000
+
+        if self.unit == UnitOfMeasurement.L:
+            self.unit = UnitOfMeasurement.ml
+            amount *= 1000
+
+        if self.unit == UnitOfMeasurement.tbsp:
+            self.unit = UnitOfMeasurement.ml
+            amount *= Decimal('14.7868')
+
+        self.amount = int(amount.to_integral_value())
+
+    @classmethod
+    def from_amount(cls, name: str, amount: int,
+                    unit: UnitOfMeasurement) -> 'Ingredient':
+        '''
+        Create Ingredient from fixed-point amount in already converted unit.
+        '''
+        ingr = cls.__new__(cls)
+        ingr.name, ingr.amount, ingr.unit = name, amount, unit
+        return ingr
+
+    @property
+    def quantity(self) -> float | str:
+        if self.amount is None:
+            return ''
+        return self.amount / SCALE
+
+    def tight_dict(self, decimals: int = QUANTITY_DECIMALS) -> dict[str, str | float]:
         """
         Returns "cleaned-up" version of dictionary, that
         Question.__dict__ usually returns. Without classes names
@@ -49,22 +132,117 @@ class Ingredient:
         """
         return {
             'name': self.name,
-            'quantity': self.quantity,
+            'quantity': round_quantity(self.quantity, decimals),
             'unit': self.unit.value
         }
 
-    def __post_init__(self):
-        if self.unit == UnitOfMeasurement.g:
-            self.unit = UnitOfMeasurement.kg
-            self.quantity /= 1000
 
-        if self.unit == UnitOfMeasurement.L:
-            self.unit = UnitOfMeasurement.ml
-            self.quantity *= 1000
+def round_quantity(quantity: float | str,
+                   decimals: int = QUANTITY_DECIMALS) -> float | str:
+    '''
+    Round quantity for output. Empty quantities are left as they are.
+    '''
+    if isinstance(quantity, str):
+        return quantity
+    return round(quantity, decimals)
+
+
+def mul_div(amount: int, numerator: int, denominator: int) -> int:
+    '''
+    Scale fixed-point amount by `numerator / denominator` in integers,
+    rounding half up, so big amounts don't lose precision in floats.
+    '''
+    return (2 * amount * numerator + denominator) // (2 * denominator)
 
-        if self.unit == UnitOfMeasurement.tbsp:
-            self.unit = UnitOfMeasurement.ml
-            self.quantity *= 14.7868
+
+class Recipes:
+    '''
+    Reusable sub-recipes, e.g. broth or tomato sauce, that day files and
+    other recipes can reference by name with `recipe` unit. Quantity of
+    such row is number of portions per person.
+
+    Each recipe is `<name>.csv` file in recipes directory, in the same
+    format as day files. Its ingredients are for the whole batch, which
+    yields as many portions as `yield,recipe,<portions>` row says, one
+    portion if there is no such row.
+    '''
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._flattened: dict[str, list[Ingredient]] = {}
+
+    def flatten(self, name: str, _parents: tuple[str, ...] = ()) -> list[Ingredient]:
+        '''Get ingredients of one portion of recipe, nested recipes expanded.
+
+        Flattened ingredients are memoized per recipe, so recipe used in
+        many menu parts or other recipes is read and expanded only once.
+
+        Args:
+            name (str): recipe name, i.e. its filename without `.csv`.
+
+        Raises:
+            ValueError: if recipe references itself, directly or not.
+
+        Returns:
+            list[Ingredient]: merged ingredients of a single portion.
+        '''
+        if name in self._flattened:
+            return self._flattened[name]
+
+        if name in _parents:
+            raise ValueError(f'Recipe `{name}` references itself through '
+                             f'`{" > ".join(_parents + (name,))}`.')
+
+        portions = SCALE
+        batch: dict[tuple[str, UnitOfMeasurement], int] = {}
+
+        for ingr in Data.read_csv(Path(self.path, f'{name}.csv')):
+            if ingr.unit != UnitOfMeasurement.recipe:
+                key = (ingr.name, ingr.unit)
+                batch[key] = batch.get(key, 0) + ingr.amount
+            elif ingr.name == 'yield':
+                portions = ingr.amount
+            else:
+                for sub in self.expand([ingr], _parents + (name,)):
+                    key = (sub.name, sub.unit)
+                    batch[key] = batch.get(key, 0) + sub.amount
+
+        if portions <= 0:
+            raise ValueError(f'Recipe `{name}` has to yield at least some portions.')
+
+        self._flattened[name] = [
+            Ingredient.from_amount(ingr_name, mul_div(amount, SCALE, portions), unit)
+            for (ingr_name, unit), amount in batch.items()
+        ]
+        return self._flattened[name]
+
+    def expand(self, ingredients: list[Ingredient],
+               _parents: tuple[str, ...] = ()) -> list[Ingredient]:
+        '''
+        Replace recipe references with their ingredients, scaled by the
+        number of portions. Other ingredients are left as they are.
+
+        Args:
+            ingredients (list[Ingredient]): day file or recipe ingredients.
+
+        Returns:
+            list[Ingredient]: ingredients without recipe references.
+        '''
+        expanded: list[Ingredient] = []
+
+        for ingr in ingredients:
+            if ingr.unit != UnitOfMeasurement.recipe:
+                expanded.append(ingr)
+                continue
+
+            for sub in self.flatten(ingr.name, _parents):
+                expanded.append(Ingredient.from_amount(
+                    sub.name, mul_div(sub.amount, ingr.amount, SCALE), sub.unit))
+
+        return expanded
+
+
+Rows = (list[Ingredient] | list[Macros] | list[Consumption] | list[PackOrder]
+        | list[dict])
 
 
 class Data:
@@ -72,6 +250,7 @@ class Data:
     Read and write operations to main questions database CSV file.
     '''
     def __init__(self, path: str) -> None:
+        self.recipes = Recipes(Path(path, RECIPES_DIRNAME))
         self.menu: dict[str, list[Ingredient]] = self.get_days(path)
         if not self.menu:
             raise ValueError(f'No Ingredients were found in files at `{path}`')
@@ -79,7 +258,8 @@ class Data:
     def get_days(self, csv_dir: str) -> dict[str, list[Ingredient]]:
         '''
         Get directory with CSV files and return dict of days, where
-        each day have list with multiple Ingredient objects.
+        each day have list with multiple Ingredient objects. Recipe
+        references are replaced with recipe ingredients.
 
         Args:
             csv_dir (str): path to directory where CSVs reside.
@@ -114,12 +294,13 @@ class Data:
 
             if match := re.match(pattern, filename):
                 day_name = match.group(1)
-                if self.read_csv(Path(filepath)):
-                    days[day_name] = self.read_csv(Path(filepath))
+                if day := self.recipes.expand(self.read_csv(Path(filepath))):
+                    days[day_name] = day
 
         return days
 
-    def read_csv(self, filepath: Path) -> list[Ingredient]:
+    @staticmethod
+    def read_csv(filepath: Path) -> list[Ingredient]:
         '''Read CSV file and return list of dataclass objects from it.
 
         Args:
@@ -145,36 +326,131 @@ class Data:
                 ))
         return day
 
-    def write_csv(self, filepath: Path, data: list[Ingredient] | list[Macros]) -> None:
+    def write_csv(self, filepath: Path, data: Rows) -> None:
         '''
         Write data to CSV file. Data can be either list of Ingredient
         object or list of dicts.
 
         Args:
             filepath (Path): filepath of CSV file.
-            data (list[Ingredient] | list[Macros]): either list of Macros
-                or Ingredient objs.
+            data (Rows): list of Ingredient, Macros, Consumption or
+                PackOrder objs, or list of dicts.
+        '''
+        self.write_rows(filepath, data, 'csv')
+
+    def write_menu(self, csv_dir: Path, menu: dict[str, list[Ingredient]]) -> None:
         '''
-        clean_data = self.obj_to_dict_for_csv(data)
+        Write menu as day files. Quantities are per person, so they are
+        written with full fixed-point precision instead of being rounded
+        like other outputs, and read back the same.
 
-        Path(filepath).resolve().parent.mkdir(parents=True, exist_ok=True)
+        Args:
+            csv_dir (Path): directory for `<day>.csv` files.
+            menu (dict[str, list[Ingredient]]): `menu` or part of it.
+        '''
+        for day, ingredients in menu.items():
+            self.write_csv(Path(csv_dir, f'{day}.csv'),
+                           [ingr.tight_dict(SCALE_DECIMALS) for ingr in ingredients])
 
-        with open(filepath, 'w') as file:
-            writer = csv.DictWriter(file, [item for item in clean_data[0]])
-            writer.writeheader()
-            writer.writerows(clean_data)
+    def write_rows(self, output: Path | str, data: Iterable, fmt: str = 'csv') -> None:
+        '''
+        Write data to file or to stdout, if output is `-`. Objs are
+        converted and written one by one as `data` produces them, so
+        generators are streamed and NDJSON consumers can start reading
+        before all rows are calculated. Files are written to temporary
+        file next to `output` and moved in place only when all rows were
+        written, so failure keeps previous file intact. New file gets
+        the mode of the file it replaces, or the one `open` would give.
+
+        Args:
+            output (Path | str): filepath or `-` for stdout.
+            data (Iterable): Rows or generator of their items.
+            fmt (str): one of OUTPUT_FORMATS.
+        '''
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f'Unknown format `{fmt}`, choose one of: '
+                             f'{", ".join(OUTPUT_FORMATS)}.')
+
+        rows = (self.obj_to_dict(item) for item in data)
+
+        if str(output) == '-':
+            self._write_rows(sys.stdout, rows, fmt)
+            return
+
+        directory = Path(output).resolve().parent
+        directory.mkdir(parents=True, exist_ok=True)
+
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp',
+                                         delete=False) as file:
+            try:
+                self._write_rows(file, rows, fmt)
+                os.chmod(file.name, self._file_mode(output))
+            except BaseException:
+                file.close()
+                os.unlink(file.name)
+                raise
+
+        os.replace(file.name, output)
 
     @staticmethod
-    def obj_to_dict_for_csv(data: list[Ingredient] | list[Macros]) -> list[dict]:
+    def _file_mode(filepath: Path | str) -> int:
         '''
-        Convert list of obj to list of dictionaries.
+        Get permission bits of existing file, otherwise default ones for
+        new file under current umask.
         '''
-        dict_data: list[dict[str, str | float]] = []
+        try:
+            return os.stat(filepath).st_mode & 0o777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    @staticmethod
+    def _write_rows(file: TextIO, rows: Iterator[dict], fmt: str) -> None:
+        match fmt:
+            case 'csv':
+                if (first := next(rows, None)) is None:
+                    return
+
+                writer = csv.DictWriter(file, [item for item in first])
+                writer.writeheader()
+
+                for row in itertools.chain([first], rows):
+                    writer.writerow(row)
+                    file.flush()
+
+            case 'ndjson':
+                for row in rows:
+                    file.write(json.dumps(row) + '\n')
+                    file.flush()
 
-        if isinstance(data[0], Ingredient):
-            dict_data = [i.tight_dict() for i in data]  # type: ignore
+            case 'json':
+                file.write('[')
+                separator = '\n  '
 
-        elif isinstance(data[0], Macros):
-            dict_data = [i.__dict__ for i in data]
+                for row in rows:
+                    file.write(separator + json.dumps(row))
+                    file.flush()
+                    separator = ',\n  '
 
-        return dict_data
+                file.write('\n]\n' if separator != '\n  ' else ']\n')
+
+    @staticmethod
+    def obj_to_dict(item: Ingredient | Macros | Consumption | PackOrder | dict) -> dict:
+        '''
+        Convert single obj to dictionary.
+        '''
+        if isinstance(item, Ingredient):
+            return item.tight_dict()
+
+        if isinstance(item, (Macros, Consumption, PackOrder)):
+            return item.__dict__
+
+        return item
+
+    @staticmethod
+    def obj_to_dict_for_csv(data: Rows) -> list[dict]:
+        '''
+        Convert list of obj to list of dictionaries.
+        '''
+        return [Data.obj_to_dict(item) for item in data]
@@ -0,0 +1,221 @@
+import csv
+
+from array import array
+from pathlib import Path
+
+from utils.consts import PREP_FILENAME, SCALE, STOCK_FILENAME
+from utils.data import Consumption, Ingredient, UnitOfMeasurement
+
+
+class History:
+    '''
+    Columnar store of archived course runs.
+
+    Archive is a directory with one sub-directory per past run, e.g.
+    `archive/2024-05-01/`, each holding that run's `order.csv` and
+    `instock.csv`. Runs are ordered by sub-directory name. Every CSV row
+    is kept as one entry of parallel typed arrays instead of Ingredient
+    objs, so thousands of files stay small in memory.
+    '''
+    ORDER = 0
+    STOCK = 1
+
+    def __init__(self, path: str) -> None:
+        self.runs: list[str] = []
+        self.names: list[str] = []
+        self.units: list[UnitOfMeasurement] = []
+        self._index: dict[str, int] = {}
+
+        self.run = array('I')
+        self.ingr = array('I')
+        self.kind = array('B')
+        self.amount = array('q')
+
+        self.ingest(path)
+        if not self.runs:
+            raise ValueError(f'No archived runs were found at `{path}`')
+
+    def ingest(self, archive_dir: str) -> None:
+        '''
+        Read every run directory in the archive into column arrays.
+
+        Args:
+            archive_dir (str): path to directory with run sub-directories.
+        '''
+        if not Path(archive_dir).is_dir():
+            raise ValueError(f'Expected `{archive_dir}` directory doesn\'t exist.')
+
+        for run_dir in sorted(p for p in Path(archive_dir).iterdir() if p.is_dir()):
+            order_path = Path(run_dir, PREP_FILENAME)
+            stock_path = Path(run_dir, STOCK_FILENAME)
+
+            if not order_path.exists() and not stock_path.exists():
+                continue
+
+            run_idx = len(self.runs)
+            self.runs.append(run_dir.name)
+
+            for kind, filepath in ((self.ORDER, order_path), (self.STOCK, stock_path)):
+                if filepath.exists():
+                    self._ingest_csv(filepath, run_idx, kind)
+
+    def _ingest_csv(self, filepath: Path, run_idx: int, kind: int) -> None:
+        '''
+        Stream one CSV file into column arrays. Rows with a unit that
+        differs from the one first seen for that ingredient are skipped.
+        '''
+        with open(filepath) as file:
+            for row in csv.DictReader(file):
+                ingr = Ingredient(
+                    name=row['name'],
+                    unit=UnitOfMeasurement(row['unit']),
+                    quantity=float(row['quantity'] or 0),
+                )
+
+                if (idx := self._index.get(ingr.name)) is None:
+                    idx = self._index[ingr.name] = len(self.names)
+                    self.names.append(ingr.name)
+                    self.units.append(ingr.unit)
+                elif self.units[idx] != ingr.unit:
+                    continue
+
+                self.run.append(run_idx)
+                self.ingr.append(idx)
+                self.kind.append(kind)
+                self.amount.append(ingr.amount)
+
+    def consumption(self, people: int, days: int) -> dict[str, float]:
+        '''Calculate actual consumption per person per day.
+
+        Rows are summed into dense run x ingredient totals in a single pass
+        over the columns. Consumption of a run is what was ordered plus
+        what was in stock minus what was left for the next run, so the
+        last run in the archive has nothing to compare against and is
+        left out. So is every run whose next run has no `instock.csv` row
+        for the ingredient, as unknown leftovers would count as consumed.
+        Negative order quantities mean stock already covered the need and
+        nothing was bought, so they count as zero.
+
+        Args:
+            people (int): number of people each archived run fed.
+            days (int): number of days each archived run lasted.
+
+        Returns:
+            dict[str, float]: example: {'carrots': 0.068, ...}
+        '''
+        n_runs, n_ingr = len(self.runs), len(self.names)
+        totals = (array('q', [0]) * (n_runs * n_ingr),
+                  array('q', [0]) * (n_runs * n_ingr))
+        seen = array('B', [0]) * (n_runs * n_ingr)
+        stocked = array('B', [0]) * (n_runs * n_ingr)
+
+        for run, ingr, kind, amount in zip(self.run, self.ingr,
+                                           self.kind, self.amount):
+            cell = run * n_ingr + ingr
+            totals[kind][cell] += amount
+            seen[cell] = 1
+            if kind == self.STOCK:
+                stocked[cell] = 1
+
+        order, stock = totals
+        consumed: dict[str, float] = {}
+
+        for ingr, name in enumerate(self.names):
+            used, count = 0, 0
+
+            for run in range(n_runs - 1):
+                cell = run * n_ingr + ingr
+                if seen[cell] and stocked[cell + n_ingr]:
+                    used += max(order[cell], 0) + stock[cell] - stock[cell + n_ingr]
+                    count += 1
+
+            if count:
+                consumed[name] = used / SCALE / count / (people * days)
+
+        return consumed
+
+    def ratios(self, planned: list[Ingredient], people: int,
+               days: int) -> dict[str, float]:
+        '''
+        Get actual/planned consumption ratio of every planned ingredient
+        that has history.
+
+        Args:
+            planned (list[Ingredient]): per person totals for `days` days,
+                as returned by `Calcprods.list_ingredients`.
+            people (int): number of people each archived run fed.
+            days (int): number of days each archived run lasted.
+
+        Returns:
+            dict[str, float]: example: {'macaroni': 1.4285714285714286, ...}
+        '''
+        actual = self.consumption(people, days)
+
+        return {
+            ingr.name: actual[ingr.name] / (ingr.quantity / days)
+            for ingr in planned if ingr.name in actual and ingr.quantity
+        }
+
+    @staticmethod
+    def corrections(planned: list[Ingredient], ratios: dict[str, float],
+                    days: int) -> list[Consumption]:
+        '''
+        Compare planned per person per day quantities against the actual
+        ones from the archive. Values are rounded for output, use `ratios`
+        for calculations.
+
+        Args:
+            planned (list[Ingredient]): per person totals for `days` days,
+                as returned by `Calcprods.list_ingredients`.
+            ratios (dict[str, float]): output of `ratios`.
+            days (int): number of days each archived run lasted.
+
+        Returns:
+            list[Consumption]: one entry per planned ingredient that has
+                history, with actual/planned ratio.
+        '''
+        rows: list[Consumption] = []
+
+        for ingr in planned:
+            if ingr.name not in ratios:
+                continue
+
+            per_day = ingr.quantity / days
+            rows.append(Consumption(
+                name=ingr.name,
+                unit=ingr.unit.value,
+                planned=round(per_day, 4),
+                actual=round(per_day * ratios[ingr.name], 4),
+                ratio=round(ratios[ingr.name], 2),
+            ))
+
+        if not rows:
+            raise ValueError('None of the planned ingredients have history in '
+                             'the archive. At least two runs are needed.')
+        return rows
+
+    @staticmethod
+    def corrected_menu(menu: dict[str, list[Ingredient]],
+                       ratios: dict[str, float]) -> dict[str, list[Ingredient]]:
+        '''
+        Scale day file quantities by the actual/planned ratio.
+
+        Args:
+            menu (dict[str, list[Ingredient]]): `Data.menu` or part of it.
+            ratios (dict[str, float]): output of `ratios`.
+
+        Returns:
+            dict[str, list[Ingredient]]: same keys as `menu`, with
+                corrected quantities.
+        '''
+        return {
+            day: [
+                Ingredient.from_amount(
+                    ingr.name,
+                    round(ingr.amount * ratios.get(ingr.name, 1)),
+                    ingr.unit,
+                )
+                for ingr in ingredients
+            ]
+            for day, ingredients in menu.items()
+        }
@@ -1,17 +1,18 @@
-from utils.consts import FOOD_API_KEY
 from utils.data import Macros
-from utils.utils import get_api_response
+from utils.providers import ApiProvider, NutritionProvider
 
 
 class Nutrition:
-    def __init__(self, names: list[str]) -> None:
+    def __init__(self, names: list[str],
+                 provider: NutritionProvider | None = None) -> None:
         self.names = names
+        self.provider = provider or ApiProvider()
         self.nutrition: list[Macros] = self.get_nutrition()
 
     def get_nutrition(self) -> list[Macros]:
         '''
         Get nutritional values and percentages for ingredients from
-        calorieninjas.com api.
+        nutrition provider, calorieninjas.com api by default.
 
         Returns:
             list[dict[str, str]]: example: [{
@@ -23,13 +24,10 @@ class Nutrition:
                 'Macros %': '33/67/0'}, {...}
             ]
         '''
-        url = 'https://api.calorieninjas.com/v1/nutrition?query='
-        headers = {'X-Api-Key': FOOD_API_KEY}
-
         ingr_with_macros: list[Macros] = []
 
-        for query in self.names:
-            if response := get_api_response(url + query, headers):
+        for response in self.provider.lookup(self.names):
+            if response:
                 if macro := self.assign_macros_to_ingr(response):
                     ingr_with_macros.append(macro)
 
@@ -0,0 +1,191 @@
+import csv
+import math
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from utils.consts import SCALE
+from utils.data import Ingredient, PackOrder, UnitOfMeasurement, round_quantity
+
+
+# Biggest dynamic programming table per ingredient. Pack sizes with tiny
+# greatest common divisor, e.g. 1 kg and 0.333333 kg, would need millions
+# of steps, so then sizes are measured in coarser steps instead.
+MAX_STEPS = 10_000
+
+
+@dataclass
+class Pack:
+    sku: str
+    amount: int
+    unit: UnitOfMeasurement
+    price: float
+
+    @property
+    def size(self) -> float:
+        return self.amount / SCALE
+
+
+class Catalog:
+    '''
+    Supplier catalog with purchasable packs of ingredients.
+    '''
+    def __init__(self, path: Path) -> None:
+        self.packs: dict[str, list[Pack]] = self.read_csv(path)
+
+    @staticmethod
+    def read_csv(filepath: Path) -> dict[str, list[Pack]]:
+        '''Read catalog CSV file with `name,sku,size,unit,price` columns.
+
+        Pack sizes are converted the same way as Ingredient quantities, so
+        500 g pack is matched against order in kg. When multiple packs of
+        the same ingredient have the same size, only the cheapest is kept.
+
+        Args:
+            filepath (Path): path to catalog CSV file.
+
+        Returns:
+            dict[str, list[Pack]]: example: {
+                'carrots': [Pack(sku='C-1', amount=500000, unit=..., price=0.4)],
+                ...}
+        '''
+        if not Path(filepath).exists():
+            raise ValueError(
+                f"{filepath} doesn't exist. Create new {filepath} with "
+                'name,sku,size,unit,price columns.'
+            )
+
+        packs: dict[str, dict[tuple[int, str], Pack]] = {}
+
+        with open(filepath) as file:
+            for row in csv.DictReader(file):
+                size = Ingredient(
+                    name=row['name'],
+                    quantity=float(row['size']),
+                    unit=UnitOfMeasurement(row['unit']),
+                )
+                pack = Pack(row['sku'], size.amount, size.unit, float(row['price']))
+
+                if pack.amount <= 0:
+                    continue
+
+                by_size = packs.setdefault(size.name, {})
+                if (key := (pack.amount, pack.unit.value)) not in by_size \
+                        or pack.price < by_size[key].price:
+                    by_size[key] = pack
+
+        return {name: list(by_size.values()) for name, by_size in packs.items()}
+
+    def pick_packs(self, ingr: Ingredient, by_waste: bool = False) -> list[PackOrder]:
+        '''Pick pack combination that covers required ingredient quantity.
+
+        Unbounded knapsack solved with dynamic programming: cheapest way
+        to buy exactly `c` units is found for every `c` up to the required
+        quantity plus the biggest pack, then the best total that is not
+        less than required is picked. Exact fixed-point sizes are divided
+        by their greatest common divisor first, so 0.5 kg and 1 kg packs
+        need few steps. If that still needs more than MAX_STEPS steps,
+        sizes are rounded down to coarser steps, which can only make the
+        picked packs cover more than required, and packs smaller than one
+        step are left out. When picking by cost, packs that are not bigger
+        than some other pack and not cheaper than it are left out too, as
+        the other pack can always replace them.
+
+        Args:
+            ingr (Ingredient): what and how much to buy.
+            by_waste (bool): prefer least leftover over least cost.
+
+        Returns:
+            list[PackOrder]: packs to buy, empty if ingredient isn't
+                needed or there are no matching packs in catalog.
+        '''
+        packs = [p for p in self.packs.get(ingr.name, []) if p.unit == ingr.unit]
+        if not packs or ingr.amount <= 0:
+            return []
+
+        if not by_waste:
+            packs = self._undominated(packs)
+
+        step = math.gcd(*(p.amount for p in packs))
+        biggest = max(p.amount for p in packs)
+        if (ingr.amount + biggest) // step > MAX_STEPS:
+            step = -(-(ingr.amount + biggest) // MAX_STEPS)
+            if not (packs := [p for p in packs if p.amount >= step]):
+                return []
+
+        sizes = [p.amount // step for p in packs]
+        target = -(-ingr.amount // step)
+        limit = target + max(sizes)
+
+        cost = [0.0] + [math.inf] * limit
+        choice = [-1] * (limit + 1)
+
+        for total in range(1, limit + 1):
+            for i, size in enumerate(sizes):
+                if size <= total and cost[total - size] + packs[i].price < cost[total]:
+                    cost[total] = cost[total - size] + packs[i].price
+                    choice[total] = i
+
+        reachable = [t for t in range(target, limit + 1) if cost[t] < math.inf]
+        if by_waste:
+            best = min(reachable, key=lambda t: (t, cost[t]))
+        else:
+            best = min(reachable, key=lambda t: (cost[t], t))
+
+        counts = [0] * len(packs)
+        while best > 0:
+            counts[choice[best]] += 1
+            best -= sizes[choice[best]]
+
+        return [
+            PackOrder(
+                name=ingr.name,
+                sku=pack.sku,
+                size=pack.size,
+                unit=pack.unit.value,
+                count=count,
+                cost=round(count * pack.price, 2),
+            )
+            for pack, count in zip(packs, counts) if count
+        ]
+
+    @staticmethod
+    def _undominated(packs: list[Pack]) -> list[Pack]:
+        '''
+        Keep only packs that are cheaper than every bigger pack.
+        '''
+        kept: list[Pack] = []
+
+        for pack in sorted(packs, key=lambda p: (-p.amount, p.price)):
+            if not kept or pack.price < kept[-1].price:
+                kept.append(pack)
+
+        return kept[::-1]
+
+    def get_pack_order(self, order: list[Ingredient],
+                       by_waste: bool = False) -> list[PackOrder]:
+        '''
+        Turn order list into list of packs to buy. Ingredients without
+        matching packs in catalog are kept as single pack of required
+        quantity with empty `sku`.
+
+        Args:
+            order (list[Ingredient]): output of `Calcprods.get_order_list`.
+            by_waste (bool): prefer least leftover over least cost.
+
+        Returns:
+            list[PackOrder]: pack-level order list.
+        '''
+        pack_order: list[PackOrder] = []
+
+        for ingr in order:
+            if ingr.amount <= 0:
+                continue
+
+            if packs := self.pick_packs(ingr, by_waste):
+                pack_order.extend(packs)
+            else:
+                pack_order.append(PackOrder(
+                    ingr.name, '', round_quantity(ingr.quantity), ingr.unit.value, 1, 0.0))
+
+        return pack_order
@@ -0,0 +1,154 @@
+import asyncio
+import csv
+import os
+import sys
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from urllib.parse import quote
+
+from utils.consts import FOOD_API_KEY_ENV, FOOD_API_URL, FOOD_DB_PATH
+from utils.utils import get_api_response
+
+
+ApiResponse = dict[str, list[dict[str, str | float]]]
+
+
+class NutritionProvider(ABC):
+    '''
+    Source of nutritional values. Every provider answers in calorieninjas.com
+    api shape, i.e. `{'items': [{'name': ..., 'calories': ..., ...}]}`,
+    so `Nutrition` doesn't care where the values came from.
+    '''
+    @abstractmethod
+    def lookup(self, names: list[str]) -> list[ApiResponse | None]:
+        '''
+        Get nutritional values for every name.
+
+        Args:
+            names (list[str]): ingredient names.
+
+        Returns:
+            list[ApiResponse | None]: one response per name, in the same
+                order, None if nothing was found or lookup failed.
+        '''
+
+
+class ApiProvider(NutritionProvider):
+    '''
+    calorieninjas.com api, one blocking request per ingredient. Failed
+    requests are reported on stderr and skipped.
+    '''
+    def __init__(self, url: str = FOOD_API_URL, api_key: str | None = None) -> None:
+        api_key = api_key or os.getenv(FOOD_API_KEY_ENV)
+        if not api_key:
+            raise ValueError(f'Api key is missing. Set {FOOD_API_KEY_ENV} '
+                             'environment variable or use local provider.')
+
+        self.url = url
+        self.headers = {'X-Api-Key': api_key}
+
+    def lookup(self, names: list[str]) -> list[ApiResponse | None]:
+        responses: list[ApiResponse | None] = []
+
+        for name in names:
+            try:
+                responses.append(get_api_response(self.url + quote(name), self.headers))
+            except ValueError as exc:
+                print(f'{name}: {exc}', file=sys.stderr)
+                responses.append(None)
+
+        return responses
+
+
+class AsyncApiProvider(ApiProvider):
+    '''
+    calorieninjas.com api with all requests sent concurrently. Requires
+    `httpx` package.
+    '''
+    def __init__(self, url: str = FOOD_API_URL, api_key: str | None = None,
+                 concurrency: int = 8) -> None:
+        super().__init__(url, api_key)
+        self.concurrency = concurrency
+
+    def lookup(self, names: list[str]) -> list[ApiResponse | None]:
+        return asyncio.run(self.lookup_async(names))
+
+    async def lookup_async(self, names: list[str]) -> list[ApiResponse | None]:
+        '''
+        Same as `lookup`, for callers that already run an event loop.
+        '''
+        try:
+            import httpx
+        except ImportError as exc:
+            raise ImportError(
+                'Async provider requires `httpx`. Install it with '
+                '`pip install httpx` or use another provider.') from exc
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(client: httpx.AsyncClient, name: str) -> ApiResponse | None:
+            async with semaphore:
+                try:
+                    response = await client.get(self.url + quote(name))
+                    response.raise_for_status()
+                    return response.json()
+                except (httpx.HTTPError, ValueError) as exc:
+                    print(f'{name}: FAILED: {exc}', file=sys.stderr)
+                    return None
+
+        async with httpx.AsyncClient(headers=self.headers) as client:
+            return await asyncio.gather(*(fetch(client, n) for n in names))
+
+
+class LocalProvider(NutritionProvider):
+    '''
+    Offline provider backed by CSV file with values per 100 g, loaded into
+    in-memory index keyed by lowercase ingredient name.
+    '''
+    def __init__(self, path: Path = FOOD_DB_PATH) -> None:
+        self.index: dict[str, dict[str, str | float]] = self.read_csv(path)
+
+    @staticmethod
+    def read_csv(filepath: Path) -> dict[str, dict[str, str | float]]:
+        '''
+        Read food database CSV file.
+
+        Args:
+            filepath (Path): path to CSV file with `name` column and
+                calorieninjas.com api named value columns.
+
+        Returns:
+            dict[str, dict[str, str | float]]: example: {
+                'basil': {'name': 'basil', 'calories': 23.0, ...}, ...}
+        '''
+        if not Path(filepath).exists():
+            raise ValueError(f"{filepath} doesn't exist.")
+
+        index: dict[str, dict[str, str | float]] = {}
+
+        with open(filepath) as file:
+            for row in csv.DictReader(file):
+                name = row.pop('name')
+                index[name.lower()] = {
+                    'name': name, **{k: float(v or 0) for k, v in row.items()}
+                }
+        return index
+
+    def lookup(self, names: list[str]) -> list[ApiResponse | None]:
+        responses: list[ApiResponse | None] = []
+
+        for name in names:
+            key = name.strip().lower()
+            item = (self.index.get(key) or self.index.get(f'{key}s')
+                    or self.index.get(key.removesuffix('s')))
+            responses.append({'items': [item]} if item else None)
+
+        return responses
+
+
+PROVIDERS: dict[str, type[NutritionProvider]] = {
+    'api': ApiProvider,
+    'async': AsyncApiProvider,
+    'local': LocalProvider,
+}
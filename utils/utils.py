@@ -1,16 +1,23 @@
 import requests
 
 from tabulate import tabulate
+from typing import TextIO
 
-from utils.data import Data, Ingredient, Macros
+from utils.data import Consumption, Data, Macros, PackOrder, Rows
 
 
-def tabulate_data(rows: list[Ingredient] | list[Macros]) -> str:
+def tabulate_data(rows: Rows) -> str:
     rows_dict = Data.obj_to_dict_for_csv(rows)
 
     colalign = ('right', 'left', 'right', 'right')
     if isinstance(rows[0], Macros):
         colalign = ('right', 'left', 'right', 'right', 'right', 'right', 'right')
+    elif isinstance(rows[0], Consumption):
+        colalign = ('right', 'left', 'right', 'right', 'right', 'right')
+    elif isinstance(rows[0], PackOrder):
+        colalign = ('right', 'left', 'left', 'right', 'right', 'right', 'right')
+    elif isinstance(rows[0], dict):
+        colalign = ('right', 'left', 'right') + ('right',) * (len(rows[0]) - 2)
 
     return tabulate(
         rows_dict,
@@ -21,8 +28,28 @@ def tabulate_data(rows: list[Ingredient] | list[Macros]) -> str:
     )
 
 
-def print_list(ingredients: list[Ingredient] | list[Macros]) -> None:
-    print(tabulate_data(ingredients))
+def print_list(ingredients: Rows, file: TextIO | None = None) -> None:
+    print(tabulate_data(ingredients), file=file)
+
+
+def summarize_timeline(timeline: list[dict]) -> str:
+    '''
+    Compact table of ingredients that run out, with the day it happens
+    and how much is missing by the last selected day.
+    '''
+    short = [
+        (row['name'], row['runs_out'], -row['left'], row['unit'])
+        for row in timeline if row['runs_out']
+    ]
+    if not short:
+        return 'Stock lasts for all selected days.'
+
+    return tabulate(
+        short,
+        headers=('name', 'runs out', 'short', 'unit'),
+        tablefmt='simple',
+        colalign=('left', 'left', 'right', 'left'),
+    )
 
 
 def split_str_to_ints(digits: str) -> list[int]:
@@ -51,25 +78,27 @@ def split_str_to_ints(digits: str) -> list[int]:
     return nums
 
 
-def get_api_response(url: str, headers=None) \
-        -> dict[str, list[dict[str, str | float]]] | None:
+def get_api_response(url: str, headers=None, get=requests.get) \
+        -> dict[str, list[dict[str, str | float]]]:
     """
     Connect to chosen api and return json response.
 
     Args:
         url (str): api url address.
         headers (str | None): headers.
+        get (Callable): function doing the request, `requests.get`
+                        compatible.
+
+    Raises:
+        ValueError: if request fails or api returns error status.
 
     Returns:
-        dict[str, str] | None: response from api.
+        dict[str, str]: response from api.
     """
-
     try:
-        response = requests.get(url, headers=headers)
+        response = get(url, headers=headers)
         response.raise_for_status()
     except requests.exceptions.RequestException as exc:
-        print(f'FAILED: {exc}')
-    else:
-        return response.json()
+        raise ValueError(f'FAILED: {exc}') from exc
 
-    return None
+    return response.json()